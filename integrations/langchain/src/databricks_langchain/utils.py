@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Any, List, Union
 from urllib.parse import urlparse
 
@@ -27,15 +28,21 @@ Matrix = Union[List[List[float]], List[np.ndarray], np.ndarray]
 
 def maximal_marginal_relevance(
     query_embedding: np.ndarray,
-    embedding_list: list,
+    embedding_list: Matrix,
     lambda_mult: float = 0.5,
     k: int = 4,
 ) -> List[int]:
     """Calculate maximal marginal relevance.
 
+    The candidate embeddings are stacked and L2-normalized once, so that all the
+    cosine similarities needed by the greedy selection come out of a single matrix
+    product. Each selection step then only updates the running maximum similarity
+    of every candidate against the last selected one.
+
     Args:
         query_embedding: Query embedding.
-        embedding_list: List of embeddings to select from.
+        embedding_list: Embeddings to select from. Either a list of embeddings or a
+            pre-stacked ``(n_candidates, dim)`` array.
         lambda_mult: Number between 0 and 1 that determines the degree
                 of diversity among the results with 0 corresponding
                 to maximum diversity and 1 to minimum diversity.
@@ -47,29 +54,72 @@ def maximal_marginal_relevance(
     """
     if min(k, len(embedding_list)) <= 0:
         return []
-    if query_embedding.ndim == 1:
-        query_embedding = np.expand_dims(query_embedding, axis=0)
-    similarity_to_query = cosine_similarity(query_embedding, embedding_list)[0]
+
+    candidates = _normalize_rows(np.asarray(embedding_list, dtype=np.float32))
+    query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+    if candidates.shape[1] != query.shape[0]:
+        raise ValueError(
+            f"The query embedding has dimension {query.shape[0]}, but the candidate "
+            f"embeddings have dimension {candidates.shape[1]}."
+        )
+
+    similarity_to_query = candidates @ query
+    similarity_matrix = _pairwise_cosine_similarity(candidates)
+
+    relevance = lambda_mult * similarity_to_query
+    scores = np.empty_like(relevance)
+    is_selected = np.zeros(len(candidates), dtype=bool)
+
     most_similar = int(np.argmax(similarity_to_query))
     idxs = [most_similar]
-    selected = np.array([embedding_list[most_similar]])
-    while len(idxs) < min(k, len(embedding_list)):
-        best_score = -np.inf
-        idx_to_add = -1
-        similarity_to_selected = cosine_similarity(embedding_list, selected)
-        for i, query_score in enumerate(similarity_to_query):
-            if i in idxs:
-                continue
-            redundant_score = max(similarity_to_selected[i])
-            equation_score = lambda_mult * query_score - (1 - lambda_mult) * redundant_score
-            if equation_score > best_score:
-                best_score = equation_score
-                idx_to_add = i
+    is_selected[most_similar] = True
+    max_similarity_to_selected = similarity_matrix[:, most_similar].copy()
+    while len(idxs) < min(k, len(candidates)):
+        # score = lambda * sim(query) - (1 - lambda) * max sim(selected), computed in place.
+        np.multiply(max_similarity_to_selected, 1 - lambda_mult, out=scores)
+        np.subtract(relevance, scores, out=scores)
+        scores[is_selected] = -np.inf
+        idx_to_add = int(np.argmax(scores))
         idxs.append(idx_to_add)
-        selected = np.append(selected, [embedding_list[idx_to_add]], axis=0)
+        is_selected[idx_to_add] = True
+        # Only the column of the newly selected candidate can raise the running maximum.
+        np.maximum(
+            max_similarity_to_selected,
+            similarity_matrix[:, idx_to_add],
+            out=max_similarity_to_selected,
+        )
     return idxs
 
 
+@lru_cache(maxsize=1)
+def _get_simsimd() -> Any:
+    try:
+        import simsimd  # type: ignore[import-not-found]
+
+        return simsimd
+    except ImportError:
+        return None
+
+
+def _pairwise_cosine_similarity(X: np.ndarray) -> np.ndarray:
+    """Pairwise cosine similarity between the L2-normalized rows of X.
+
+    Uses the SIMD kernels of the optional `simsimd` package when it is installed
+    (``pip install databricks-langchain[simsimd]``), and otherwise a single
+    BLAS-backed matrix product.
+    """
+    if (simsimd := _get_simsimd()) is not None:
+        return 1 - np.asarray(simsimd.cdist(X, X, metric="cosine"), dtype=np.float32)
+    return X @ X.T
+
+
+def _normalize_rows(X: np.ndarray) -> np.ndarray:
+    """Return a copy of X with L2-normalized rows. All-zero rows are left as zeros."""
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+
 def cosine_similarity(X: Matrix, Y: Matrix) -> np.ndarray:
     """Row-wise cosine similarity between two equal-width matrices.
 
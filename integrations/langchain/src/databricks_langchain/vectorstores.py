@@ -1,16 +1,25 @@
 from __future__ import annotations
 
 import asyncio
+import copy
+import hashlib
 import inspect
+import json
 import logging
+import threading
+import time
 import uuid
+import weakref
+from collections import OrderedDict
 from functools import partial
 from typing import (
     Any,
     Callable,
     Dict,
     Iterable,
+    Iterator,
     List,
+    Literal,
     Optional,
     Tuple,
     Type,
@@ -36,6 +45,52 @@ logger = logging.getLogger(__name__)
 
 _DIRECT_ACCESS_ONLY_MSG = "`%s` is only supported for direct-access index."
 _NON_MANAGED_EMB_ONLY_MSG = "`%s` is not supported for index with Databricks-managed embeddings."
+_DEFAULT_CACHE_CONFIG = {"max_size": 1024, "ttl_seconds": 300, "enabled": True}
+_MMR_PRECISIONS = ("fp32", "fp16", "int8")
+# Above this fraction of MMR candidates missing from the vector cache, fetching the vectors of
+# the missing candidates in a second request costs more than fetching all of them at once.
+_MAX_VECTOR_CACHE_MISS_RATE = 0.5
+
+
+class _QueryCache:
+    """A thread-safe LRU cache whose entries expire ``ttl_seconds`` after insertion."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: Any) -> Any:
+        """Return the cached value for ``key``, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
 
 
 class DatabricksVectorSearch(VectorStore):
@@ -74,6 +129,26 @@ class DatabricksVectorSearch(VectorStore):
                     Allows you to pass in values like ``service_principal_client_id``
                     and ``service_principal_client_secret`` to allow for
                     service principal authentication instead of personal access token authentication.
+        cache_config: Configuration of the in-process cache for query embeddings and
+                    search responses used by ``similarity_search``. Supported keys are
+                    ``max_size`` (default 1024), ``ttl_seconds`` (default 300) and
+                    ``enabled`` (default True). Caching is disabled if not specified.
+                    Cached search responses are dropped by ``add_texts`` and ``delete``.
+        vector_cache_size: Maximum number of vectors written by ``add_texts`` to keep in
+                    memory, keyed by primary key. When the cache is not empty,
+                    ``max_marginal_relevance_search`` first queries the index without the
+                    embedding column and takes the candidate vectors from the cache,
+                    fetching only the missing ones by primary key. After a search where
+                    most candidates were missing, the embedding column is requested up
+                    front again until most candidates are cached.
+                    Useful for read-after-write workloads on a direct-access index.
+                    Defaults to 0 (disabled).
+        mmr_precision: Precision of the vectors kept in the vector cache, one of
+                    ``"fp32"``, ``"fp16"`` or ``"int8"``. Reduced precisions store
+                    L2-normalized vectors, which preserves MMR rankings in practice while
+                    halving (fp16) or quartering (int8) the memory used. Defaults to
+                    ``"fp32"``, which keeps the vectors exactly as embedded. Reduced
+                    precisions require a positive ``vector_cache_size``.
 
     **Instantiate**:
 
@@ -229,12 +304,26 @@ class DatabricksVectorSearch(VectorStore):
         workspace_client: Optional[WorkspaceClient] = None,
         client_args: Optional[Dict[str, Any]] = None,
         include_score: bool = False,
+        cache_config: Optional[Dict[str, Any]] = None,
+        vector_cache_size: int = 0,
+        mmr_precision: Literal["fp32", "fp16", "int8"] = "fp32",
     ):
         if not isinstance(index_name, str):
             raise ValueError(
                 f"The `index_name` parameter must be a string, but got {type(index_name).__name__}."
             )
 
+        if mmr_precision not in _MMR_PRECISIONS:
+            raise ValueError(
+                f"The `mmr_precision` parameter must be one of {_MMR_PRECISIONS}, "
+                f"but got {mmr_precision!r}."
+            )
+        if mmr_precision != "fp32" and vector_cache_size <= 0:
+            raise ValueError(
+                "The `mmr_precision` parameter only applies to the vector cache. "
+                "Please set `vector_cache_size` to a positive value to use it."
+            )
+
         if index_name.count(".") != 2:
             raise ValueError(
                 f"The `index_name` parameter must be in the format 'catalog.schema.name', but got {index_name!r}."
@@ -261,9 +350,8 @@ class DatabricksVectorSearch(VectorStore):
                 client_args.setdefault(
                     "credential_strategy", CredentialStrategy.MODEL_SERVING_USER_CREDENTIALS
                 )
-            self.index = VectorSearchClient(**client_args).get_index(
-                endpoint_name=endpoint, index_name=index_name
-            )
+            self._client = VectorSearchClient(**client_args)
+            self.index = self._client.get_index(endpoint_name=endpoint, index_name=index_name)
         except Exception as e:
             if endpoint is None and "Wrong vector search endpoint" in str(e):
                 raise ValueError(
@@ -275,7 +363,23 @@ class DatabricksVectorSearch(VectorStore):
             else:
                 raise
 
+        self._endpoint = endpoint
+        self._index_name = index_name
+        # Async counterparts of `self.index`, one per event loop. The index is resolved once,
+        # lazily, and bound to every other event loop without resolving it again.
+        self._resolved_async_index: Any = None
+        self._resolve_async_index_lock = threading.Lock()
+        self._async_indexes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._async_search_param_names: frozenset = frozenset()
         self._index_details = IndexDetails(self.index)
+        # The index configuration does not change over the lifetime of the vector store, so
+        # resolve the flags and the embedding column checked on every request once.
+        self._is_delta_sync = self._index_details.is_delta_sync_index()
+        self._is_managed_embeddings = self._index_details.is_databricks_managed_embeddings()
+        self._embedding_column_name = self._index_details.embedding_vector_column.get("name")
+        self._search_param_names = frozenset(
+            inspect.signature(self.index.similarity_search).parameters
+        )
 
         _validate_embedding(embedding, self._index_details)
         self._embeddings = embedding
@@ -283,6 +387,7 @@ class DatabricksVectorSearch(VectorStore):
         self._columns = validate_and_get_return_columns(
             columns or [], self._text_column, self._index_details, doc_uri, primary_key
         )
+        self._column_set = frozenset(self._columns)
         self._primary_key = self._index_details.primary_key
         self._retriever_schema = RetrieverSchema(
             text_column=self._text_column,
@@ -292,6 +397,26 @@ class DatabricksVectorSearch(VectorStore):
         )
         self._include_score = include_score
 
+        self._embedding_cache: Optional[_QueryCache] = None
+        self._search_cache: Optional[_QueryCache] = None
+        if cache_config is not None:
+            cache_config = {**_DEFAULT_CACHE_CONFIG, **cache_config}
+            if cache_config["enabled"]:
+                self._embedding_cache = _QueryCache(
+                    cache_config["max_size"], cache_config["ttl_seconds"]
+                )
+                self._search_cache = _QueryCache(
+                    cache_config["max_size"], cache_config["ttl_seconds"]
+                )
+        self._mmr_precision = mmr_precision
+        self._vector_cache: Optional[_QueryCache] = (
+            _QueryCache(vector_cache_size, ttl_seconds=float("inf"))
+            if vector_cache_size > 0
+            else None
+        )
+        # Fraction of the candidates of the last MMR search that were missing from the cache
+        self._vector_cache_miss_rate = 0.0
+
     @property
     def embeddings(self) -> Optional[Embeddings]:
         """Access the query embedding object if available."""
@@ -314,6 +439,9 @@ class DatabricksVectorSearch(VectorStore):
         texts: Iterable[str],
         metadatas: Optional[List[Dict]] = None,
         ids: Optional[List[Any]] = None,
+        *,
+        embedding_batch_size: int = 128,
+        upsert_batch_size: int = 100,
         **kwargs: Any,
     ) -> List[str]:
         """Add texts to the index.
@@ -327,35 +455,61 @@ class DatabricksVectorSearch(VectorStore):
             metadatas: List of metadata for each text. Defaults to None.
             ids: List of ids for each text. Defaults to None.
                 If not provided, a random uuid will be generated for each text.
+            embedding_batch_size: Maximum number of texts sent to the embedding model
+                in a single request. Defaults to 128.
+            upsert_batch_size: Maximum number of rows upserted into the index in a
+                single request. Defaults to 100.
 
         Returns:
             List of ids from adding the texts into the index.
         """
-        if self._index_details.is_delta_sync_index():
+        if self._is_delta_sync:
             raise NotImplementedError(_DIRECT_ACCESS_ONLY_MSG % "add_texts")
+        if embedding_batch_size <= 0 or upsert_batch_size <= 0:
+            raise ValueError("`embedding_batch_size` and `upsert_batch_size` must be positive.")
 
         # Wrap to list if input texts is a single string
         if isinstance(texts, str):
             texts = [texts]
         texts = list(texts)
-        vectors = self._embeddings.embed_documents(texts)  # type: ignore[union-attr]
+        vectors: List[List[float]] = []
+        for i in range(0, len(texts), embedding_batch_size):
+            batch = texts[i : i + embedding_batch_size]
+            vectors.extend(self._embeddings.embed_documents(batch))  # type: ignore[union-attr]
         ids = ids or [str(uuid.uuid4()) for _ in texts]
-        metadatas = metadatas or [{} for _ in texts]
 
-        updates = [
-            {
-                self._primary_key: id_,
-                self._text_column: text,
-                self._index_details.embedding_vector_column["name"]: vector,
-                **metadata,
-            }
-            for text, vector, id_, metadata in zip(texts, vectors, ids, metadatas)
-        ]
-
-        upsert_resp = self.index.upsert(updates)
-        if upsert_resp.get("status") in ("PARTIAL_SUCCESS", "FAILURE"):
-            failed_ids = upsert_resp.get("result", dict()).get("failed_primary_keys", [])
-            if upsert_resp.get("status") == "FAILURE":
+        primary_key = self._primary_key
+        text_column = self._text_column
+        vector_column = self._embedding_column_name
+        if metadatas and any(metadatas):
+            updates = [
+                {primary_key: id_, text_column: text, vector_column: vector, **metadata}
+                for text, vector, id_, metadata in zip(texts, vectors, ids, metadatas)
+            ]
+        else:
+            # Skip unpacking empty metadata dicts for every row.
+            updates = [
+                {primary_key: id_, text_column: text, vector_column: vector}
+                for text, vector, id_ in zip(texts, vectors, ids)
+            ]
+
+        # Upsert in chunks so that a rejected request only fails the rows it carried.
+        statuses = []
+        failed_ids = set()
+        for i in range(0, len(updates), upsert_batch_size):
+            upsert_resp = self.index.upsert(updates[i : i + upsert_batch_size])
+            status = upsert_resp.get("status")
+            statuses.append(status)
+            if status in ("PARTIAL_SUCCESS", "FAILURE"):
+                failed_ids.update(upsert_resp.get("result", dict()).get("failed_primary_keys", []))
+        self._clear_search_cache()
+        if self._vector_cache is not None:
+            for id_, vector in zip(ids, vectors):
+                if id_ not in failed_ids:
+                    self._vector_cache.put(str(id_), _quantize_vector(vector, self._mmr_precision))
+
+        if any(status in ("PARTIAL_SUCCESS", "FAILURE") for status in statuses):
+            if all(status == "FAILURE" for status in statuses):
                 logger.error("Failed to add texts to the index.")
             else:
                 logger.warning("Some texts failed to be added to the index.")
@@ -367,10 +521,11 @@ class DatabricksVectorSearch(VectorStore):
         self,
         texts: Iterable[str],
         metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[Any]] = None,
         **kwargs: Any,
     ) -> List[str]:
-        return await asyncio.get_running_loop().run_in_executor(
-            None, partial(self.add_texts, **kwargs), texts, metadatas
+        return await asyncio.to_thread(
+            self.add_texts, texts, metadatas=metadatas, ids=ids, **kwargs
         )
 
     def delete(self, ids: Optional[List[Any]] = None, **kwargs: Any) -> Optional[bool]:
@@ -386,12 +541,16 @@ class DatabricksVectorSearch(VectorStore):
         Returns:
             True if successful.
         """
-        if self._index_details.is_delta_sync_index():
+        if self._is_delta_sync:
             raise NotImplementedError(_DIRECT_ACCESS_ONLY_MSG % "delete")
 
         if ids is None:
             raise ValueError("ids must be provided.")
         self.index.delete(ids)
+        self._clear_search_cache()
+        if self._vector_cache is not None:
+            for id_ in ids:
+                self._vector_cache.pop(str(id_))
         return True
 
     def similarity_search(
@@ -427,11 +586,8 @@ class DatabricksVectorSearch(VectorStore):
         return [doc for doc, _ in docs_with_score]
 
     async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
-        # This is a temporary workaround to make the similarity search
-        # asynchronous. The proper solution is to make the similarity search
-        # asynchronous in the vector store implementations.
-        func = partial(self.similarity_search, query, k=k, **kwargs)
-        return await asyncio.get_event_loop().run_in_executor(None, func)
+        docs_with_score = await self.asimilarity_search_with_score(query, k=k, **kwargs)
+        return [doc for doc, _ in docs_with_score]
 
     def similarity_search_with_score(
         self,
@@ -456,20 +612,103 @@ class DatabricksVectorSearch(VectorStore):
         Returns:
             List of Documents most similar to the embedding and score for each.
         """
-        if self._index_details.is_databricks_managed_embeddings():
+        query_vector = None if self._is_managed_embeddings else self._embed_query(query)
+        search_kwargs = self._get_search_kwargs(
+            query, query_vector, k, filter, query_type, kwargs, self._search_param_names
+        )
+        search_resp = self._similarity_search(search_kwargs)
+        return parse_vector_search_response(
+            search_resp,
+            retriever_schema=self._retriever_schema,
+            document_class=Document,
+            include_score=self._include_score,
+        )
+
+    def isimilarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        *,
+        query_type: Optional[str] = None,
+        page_size: int = 50,
+        **kwargs: Any,
+    ) -> Iterator[Document]:
+        """Lazily iterate over the docs most similar to query.
+
+        The results are fetched with a single request and turned into Documents
+        `page_size` rows at a time, so that the first Documents are available without
+        materializing all `k` of them.
+
+        Args:
+            query: Text to look up documents similar to.
+            k: Number of Documents to return. Defaults to 4.
+            filter: Filters to apply to the query. Defaults to None.
+            query_type: The type of this query. Supported values are "ANN" and "HYBRID".
+            page_size: Number of result rows to convert into Documents at a time.
+                Defaults to 50.
+            kwargs: Additional keyword arguments to pass to `databricks.vector_search.client.VectorSearchIndex.similarity_search`. `See
+                    documentation <https://api-docs.databricks.com/python/vector-search/databricks.vector_search.html#databricks.vector_search.index.VectorSearchIndex.similarity_search>`_
+                    to see the full set of supported keyword arguments
+
+        Returns:
+            Iterator over the Documents most similar to the query.
+        """
+        if page_size <= 0:
+            raise ValueError("`page_size` must be a positive integer.")
+
+        query_vector = None if self._is_managed_embeddings else self._embed_query(query)
+        search_kwargs = self._get_search_kwargs(
+            query, query_vector, k, filter, query_type, kwargs, self._search_param_names
+        )
+        search_resp = self._similarity_search(search_kwargs)
+        return self._iter_documents(search_resp, page_size)
+
+    def _iter_documents(self, search_resp: Dict, page_size: int) -> Iterator[Document]:
+        manifest = search_resp.get("manifest", {})
+        rows = search_resp.get("result", {}).get("data_array") or []
+        for start in range(0, len(rows), page_size):
+            page = {"manifest": manifest, "result": {"data_array": rows[start : start + page_size]}}
+            for doc, _ in parse_vector_search_response(
+                page,
+                retriever_schema=self._retriever_schema,
+                document_class=Document,
+                include_score=self._include_score,
+            ):
+                yield doc
+
+    def _similarity_search(self, search_kwargs: Dict[str, Any]) -> Dict:
+        """Run `similarity_search` on the index, going through the search cache if enabled."""
+        if self._search_cache is None:
+            return self.index.similarity_search(**search_kwargs)
+        cache_key = _search_cache_key(search_kwargs)
+        search_resp = self._search_cache.get(cache_key)
+        if search_resp is None:
+            search_resp = self.index.similarity_search(**search_kwargs)
+            self._search_cache.put(cache_key, search_resp)
+        return search_resp
+
+    def _get_search_kwargs(
+        self,
+        query: str,
+        query_vector: Optional[List[float]],
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        query_type: Optional[str],
+        kwargs: Dict[str, Any],
+        supported_params: frozenset,
+    ) -> Dict[str, Any]:
+        """Build the keyword arguments of a `similarity_search` request for a text query."""
+        if self._is_managed_embeddings:
+            query_text: Optional[str] = query
+        # The value for `query_text` needs to be specified only for hybrid search.
+        elif query_type is not None and query_type.upper() == "HYBRID":
             query_text = query
-            query_vector = None
         else:
-            # The value for `query_text` needs to be specified only for hybrid search.
-            if query_type is not None and query_type.upper() == "HYBRID":
-                query_text = query
-            else:
-                query_text = None
-            query_vector = self._embeddings.embed_query(query)  # type: ignore[union-attr]
+            query_text = None
 
-        signature = inspect.signature(self.index.similarity_search)
-        kwargs = {k: v for k, v in kwargs.items() if k in signature.parameters}
-        kwargs.update(
+        search_kwargs = {key: value for key, value in kwargs.items() if key in supported_params}
+        search_kwargs.update(
             {
                 "columns": self._columns,
                 "query_text": query_text,
@@ -479,13 +718,65 @@ class DatabricksVectorSearch(VectorStore):
                 "query_type": query_type,
             }
         )
-        search_resp = self.index.similarity_search(**kwargs)
-        return parse_vector_search_response(
-            search_resp,
-            retriever_schema=self._retriever_schema,
-            document_class=Document,
-            include_score=self._include_score,
-        )
+        return search_kwargs
+
+    def _embed_query(self, query: str) -> List[float]:
+        """Embed the query, going through the embedding cache if it is enabled."""
+        if self._embedding_cache is None:
+            return self._embeddings.embed_query(query)  # type: ignore[union-attr]
+        query_vector = self._embedding_cache.get(query)
+        if query_vector is None:
+            query_vector = self._embeddings.embed_query(query)  # type: ignore[union-attr]
+            self._embedding_cache.put(query, query_vector)
+        return query_vector
+
+    async def _aembed_query(self, query: str) -> List[float]:
+        """Async version of `_embed_query`."""
+        if self._embedding_cache is None:
+            return await self._embeddings.aembed_query(query)  # type: ignore[union-attr]
+        query_vector = self._embedding_cache.get(query)
+        if query_vector is None:
+            query_vector = await self._embeddings.aembed_query(query)  # type: ignore[union-attr]
+            self._embedding_cache.put(query, query_vector)
+        return query_vector
+
+    async def _aget_async_index(self) -> Any:
+        """Return the async index bound to the running event loop.
+
+        Returns None if the installed `databricks-vectorsearch` has no async client.
+        """
+        if not hasattr(self._client, "get_async_index"):
+            return None
+        loop = asyncio.get_running_loop()
+        async_index = self._async_indexes.get(loop)
+        if async_index is None:
+            resolved = self._resolved_async_index
+            if resolved is None:
+                # Resolving the index issues a blocking request, so keep it off the event loop.
+                resolved = await asyncio.to_thread(self._resolve_async_index)
+                async_index = resolved
+            else:
+                async_index = _copy_async_index(resolved)
+            # Concurrent first calls on this loop all use the index bound by the first of them.
+            async_index = self._async_indexes.setdefault(loop, async_index)
+        return async_index
+
+    def _resolve_async_index(self) -> Any:
+        """Resolve the async index once, however many threads and event loops ask for it."""
+        with self._resolve_async_index_lock:
+            if self._resolved_async_index is None:
+                async_index = self._client.get_async_index(
+                    endpoint_name=self._endpoint, index_name=self._index_name
+                )
+                self._async_search_param_names = frozenset(
+                    inspect.signature(async_index.similarity_search).parameters
+                )
+                self._resolved_async_index = async_index
+            return self._resolved_async_index
+
+    def _clear_search_cache(self) -> None:
+        if self._search_cache is not None:
+            self._search_cache.clear()
 
     def _select_relevance_score_fn(self) -> Callable[[float], float]:
         """
@@ -495,13 +786,45 @@ class DatabricksVectorSearch(VectorStore):
         return lambda score: score
 
     async def asimilarity_search_with_score(
-        self, *args: Any, **kwargs: Any
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        *,
+        query_type: Optional[str] = None,
+        **kwargs: Any,
     ) -> List[Tuple[Document, float]]:
-        # This is a temporary workaround to make the similarity search
-        # asynchronous. The proper solution is to make the similarity search
-        # asynchronous in the vector store implementations.
-        func = partial(self.similarity_search_with_score, *args, **kwargs)
-        return await asyncio.get_event_loop().run_in_executor(None, func)
+        async_index = await self._aget_async_index()
+        if async_index is None:
+            # The installed `databricks-vectorsearch` has no async client, so run the
+            # blocking search in a worker thread instead.
+            return await asyncio.to_thread(
+                self.similarity_search_with_score,
+                query,
+                k=k,
+                filter=filter,
+                query_type=query_type,
+                **kwargs,
+            )
+
+        query_vector = None if self._is_managed_embeddings else await self._aembed_query(query)
+        search_kwargs = self._get_search_kwargs(
+            query, query_vector, k, filter, query_type, kwargs, self._async_search_param_names
+        )
+        if self._search_cache is None:
+            search_resp = await async_index.similarity_search(**search_kwargs)
+        else:
+            cache_key = _search_cache_key(search_kwargs)
+            search_resp = self._search_cache.get(cache_key)
+            if search_resp is None:
+                search_resp = await async_index.similarity_search(**search_kwargs)
+                self._search_cache.put(cache_key, search_resp)
+        return parse_vector_search_response(
+            search_resp,
+            retriever_schema=self._retriever_schema,
+            document_class=Document,
+            include_score=self._include_score,
+        )
 
     def similarity_search_by_vector(
         self,
@@ -527,7 +850,7 @@ class DatabricksVectorSearch(VectorStore):
         Returns:
             List of Documents most similar to the embedding.
         """
-        if self._index_details.is_databricks_managed_embeddings():
+        if self._is_managed_embeddings:
             raise NotImplementedError(_NON_MANAGED_EMB_ONLY_MSG % "similarity_search_by_vector")
 
         docs_with_score = self.similarity_search_by_vector_with_score(
@@ -543,11 +866,7 @@ class DatabricksVectorSearch(VectorStore):
     async def asimilarity_search_by_vector(
         self, embedding: List[float], k: int = 4, **kwargs: Any
     ) -> List[Document]:
-        # This is a temporary workaround to make the similarity search
-        # asynchronous. The proper solution is to make the similarity search
-        # asynchronous in the vector store implementations.
-        func = partial(self.similarity_search_by_vector, embedding, k=k, **kwargs)
-        return await asyncio.get_event_loop().run_in_executor(None, func)
+        return await asyncio.to_thread(self.similarity_search_by_vector, embedding, k=k, **kwargs)
 
     def similarity_search_by_vector_with_score(
         self,
@@ -577,7 +896,7 @@ class DatabricksVectorSearch(VectorStore):
         Returns:
             List of Documents most similar to the embedding and score for each.
         """
-        if self._index_details.is_databricks_managed_embeddings():
+        if self._is_managed_embeddings:
             raise NotImplementedError(
                 _NON_MANAGED_EMB_ONLY_MSG % "similarity_search_by_vector_with_score"
             )
@@ -642,10 +961,10 @@ class DatabricksVectorSearch(VectorStore):
         Returns:
             List of Documents selected by maximal marginal relevance.
         """
-        if self._index_details.is_databricks_managed_embeddings():
+        if self._is_managed_embeddings:
             raise NotImplementedError(_NON_MANAGED_EMB_ONLY_MSG % "max_marginal_relevance_search")
 
-        query_vector = self._embeddings.embed_query(query)  # type: ignore[union-attr]
+        query_vector = self._embed_query(query)
         docs = self.max_marginal_relevance_search_by_vector(
             query_vector,
             k,
@@ -664,10 +983,7 @@ class DatabricksVectorSearch(VectorStore):
         lambda_mult: float = 0.5,
         **kwargs: Any,
     ) -> List[Document]:
-        # This is a temporary workaround to make the similarity search
-        # asynchronous. The proper solution is to make the similarity search
-        # asynchronous in the vector store implementations.
-        func = partial(
+        return await asyncio.to_thread(
             self.max_marginal_relevance_search,
             query,
             k=k,
@@ -675,7 +991,6 @@ class DatabricksVectorSearch(VectorStore):
             lambda_mult=lambda_mult,
             **kwargs,
         )
-        return await asyncio.get_event_loop().run_in_executor(None, func)
 
     def max_marginal_relevance_search_by_vector(
         self,
@@ -710,14 +1025,14 @@ class DatabricksVectorSearch(VectorStore):
         Returns:
             List of Documents selected by maximal marginal relevance.
         """
-        if self._index_details.is_databricks_managed_embeddings():
+        if self._is_managed_embeddings:
             raise NotImplementedError(
                 _NON_MANAGED_EMB_ONLY_MSG % "max_marginal_relevance_search_by_vector"
             )
 
-        embedding_column = self._index_details.embedding_vector_column["name"]
-        search_resp = self.index.similarity_search(
-            columns=list(set(self._columns + [embedding_column])),
+        embedding_column = self._embedding_column_name
+        search = partial(
+            self.index.similarity_search,
             query_text=None,
             query_vector=embedding,
             filters=filter,
@@ -726,21 +1041,46 @@ class DatabricksVectorSearch(VectorStore):
             **kwargs,
         )
 
-        embeddings_result_index = (
-            search_resp.get("manifest").get("columns").index({"name": embedding_column})
+        embeddings = None
+        use_vector_cache = (
+            self._vector_cache is not None
+            and len(self._vector_cache) > 0
+            and self._vector_cache_miss_rate <= _MAX_VECTOR_CACHE_MISS_RATE
         )
-        embeddings = [
-            doc[embeddings_result_index] for doc in search_resp.get("result").get("data_array")
-        ]
+        if use_vector_cache:
+            # Try to take the candidate vectors from the local cache and skip fetching the
+            # embedding column, which dominates the response size.
+            search_resp = search(columns=self._columns)
+            embeddings = self._get_cached_candidate_embeddings(search_resp, embedding, filter)
+        if embeddings is None:
+            search_resp = search(columns=list(self._column_set | {embedding_column}))
+            column_index = {
+                col["name"]: i for i, col in enumerate(search_resp["manifest"]["columns"])
+            }
+            embeddings_result_index = column_index[embedding_column]
+            data_array = search_resp.get("result").get("data_array")
+            # Fill a preallocated float32 matrix instead of letting numpy infer the dtype of
+            # a list of lists.
+            dimension = len(data_array[0][embeddings_result_index]) if data_array else 0
+            embeddings = np.empty((len(data_array), dimension), dtype=np.float32)
+            for i, row in enumerate(data_array):
+                embeddings[i] = row[embeddings_result_index]
+            if self._vector_cache is not None and not use_vector_cache:
+                # Keep track of how many candidates the cache would have had, so that the
+                # cache is used again once most of them are cached.
+                primary_key_index = column_index[self._primary_key]
+                self._vector_cache_miss_rate = _miss_rate(
+                    self._vector_cache, [row[primary_key_index] for row in data_array or []]
+                )
 
         mmr_selected = maximal_marginal_relevance(
-            np.array(embedding, dtype=np.float32),
+            np.asarray(embedding, dtype=np.float32),
             embeddings,
             k=k,
             lambda_mult=lambda_mult,
         )
 
-        ignore_cols: List = [embedding_column] if embedding_column not in self._columns else []
+        ignore_cols: List = [embedding_column] if embedding_column not in self._column_set else []
         candidates = parse_vector_search_response(
             search_resp,
             retriever_schema=self._retriever_schema,
@@ -748,9 +1088,63 @@ class DatabricksVectorSearch(VectorStore):
             document_class=Document,
             include_score=self._include_score,
         )
-        selected_results = [r[0] for i, r in enumerate(candidates) if i in mmr_selected]
+        # Emit the documents in MMR selection order rather than in similarity order.
+        selected_results = [candidates[i][0] for i in mmr_selected]
         return selected_results
 
+    def _get_cached_candidate_embeddings(
+        self, search_resp: Dict, query_vector: List[float], filter: Optional[Any]
+    ) -> Optional[np.ndarray]:
+        """Stack the vectors of the search results, taking them from the vector cache.
+
+        Only the vectors missing from the cache are fetched from the index, by primary key.
+        Returns None if some of them cannot be fetched.
+        """
+        column_index = {col["name"]: i for i, col in enumerate(search_resp["manifest"]["columns"])}
+        primary_key_index = column_index[self._primary_key]
+        data_array = search_resp.get("result").get("data_array") or []
+        primary_keys = [row[primary_key_index] for row in data_array]
+        cached = [self._vector_cache.get(str(key)) for key in primary_keys]  # type: ignore[union-attr]
+        missing = [key for key, entry in zip(primary_keys, cached) if entry is None]
+        self._vector_cache_miss_rate = len(missing) / len(primary_keys) if primary_keys else 0.0
+        fetched = self._fetch_vectors(missing, query_vector, filter) if missing else {}
+
+        entries = []
+        for key, entry in zip(primary_keys, cached):
+            if entry is None:
+                if (vector := fetched.get(str(key))) is None:
+                    return None
+                entry = (vector, 1.0)
+            entries.append(entry)
+
+        dimension = len(entries[0][0]) if entries else 0
+        embeddings = np.empty((len(entries), dimension), dtype=np.float32)
+        for i, (vector, scale) in enumerate(entries):
+            # Assigning into the float32 matrix dequantizes fp16/int8 vectors.
+            embeddings[i] = vector
+            if scale != 1.0:
+                embeddings[i] *= scale
+        return embeddings
+
+    def _fetch_vectors(
+        self, primary_keys: List[Any], query_vector: List[float], filter: Optional[Any]
+    ) -> Dict[str, List[float]]:
+        """Fetch the vectors of the given rows from the index, keyed by primary key."""
+        embedding_column = self._embedding_column_name
+        search_resp = self.index.similarity_search(
+            columns=[self._primary_key, embedding_column],
+            query_vector=query_vector,
+            filters=_primary_key_filter(self._primary_key, primary_keys, filter),
+            num_results=len(primary_keys),
+        )
+        column_index = {col["name"]: i for i, col in enumerate(search_resp["manifest"]["columns"])}
+        primary_key_index = column_index[self._primary_key]
+        embedding_index = column_index[embedding_column]
+        return {
+            str(row[primary_key_index]): row[embedding_index]
+            for row in search_resp.get("result", {}).get("data_array") or []
+        }
+
     async def amax_marginal_relevance_search_by_vector(
         self,
         embedding: List[float],
@@ -759,7 +1153,73 @@ class DatabricksVectorSearch(VectorStore):
         lambda_mult: float = 0.5,
         **kwargs: Any,
     ) -> List[Document]:
-        raise NotImplementedError
+        return await asyncio.to_thread(
+            self.max_marginal_relevance_search_by_vector,
+            embedding,
+            k=k,
+            fetch_k=fetch_k,
+            lambda_mult=lambda_mult,
+            **kwargs,
+        )
+
+
+def _copy_async_index(async_index: Any) -> Any:
+    """Copy a resolved async index for use on another event loop, without resolving it again.
+
+    An asyncio lock is bound to the event loop that first waits on it, so the copy gets new ones.
+    """
+    async_index = copy.copy(async_index)
+    for name, value in vars(async_index).items():
+        if isinstance(value, asyncio.Lock):
+            setattr(async_index, name, asyncio.Lock())
+    return async_index
+
+
+def _quantize_vector(vector: List[float], precision: str) -> Tuple[np.ndarray, float]:
+    """Encode a vector for the vector cache, returning the stored array and its scale."""
+    array = np.asarray(vector, dtype=np.float32)
+    if precision == "fp32":
+        return array, 1.0
+    # MMR only depends on the direction of the vectors, so normalize before reducing the
+    # precision to make the best use of the fp16/int8 range.
+    if (norm := np.linalg.norm(array)) > 0:
+        array = array / norm
+    if precision == "fp16":
+        return array.astype(np.float16), 1.0
+    scale = float(np.abs(array).max()) / 127 or 1.0
+    return np.round(array / scale).astype(np.int8), scale
+
+
+def _miss_rate(cache: _QueryCache, keys: List[Any]) -> float:
+    """Return the fraction of ``keys`` that are missing from the vector cache."""
+    if not keys:
+        return 0.0
+    return sum(cache.get(str(key)) is None for key in keys) / len(keys)
+
+
+def _primary_key_filter(primary_key: str, values: List[Any], filter: Optional[Any]) -> Any:
+    """Build a filter matching the rows with the given primary keys.
+
+    Uses the SQL-like string syntax when the filter of the search is a string, as required by
+    storage-optimized endpoints, and the dictionary syntax otherwise.
+    """
+    if isinstance(filter, str):
+        literals = ", ".join(
+            "'" + value.replace("'", "''") + "'" if isinstance(value, str) else str(value)
+            for value in values
+        )
+        return f"{primary_key} IN ({literals})"
+    return {primary_key: list(values)}
+
+
+def _search_cache_key(search_kwargs: Dict[str, Any]) -> str:
+    """Build a cache key for a `similarity_search` request from its keyword arguments."""
+    key_kwargs = dict(search_kwargs)
+    if (query_vector := key_kwargs.get("query_vector")) is not None:
+        key_kwargs["query_vector"] = hashlib.blake2b(
+            np.asarray(query_vector, dtype=np.float32).tobytes(), digest_size=16
+        ).hexdigest()
+    return json.dumps(key_kwargs, sort_keys=True, default=str)
 
 
 def _validate_embedding(embedding: Optional[Embeddings], index_details: IndexDetails) -> None:
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from databricks_langchain.utils import _pairwise_cosine_similarity, maximal_marginal_relevance
+
+
+def test_maximal_marginal_relevance_empty() -> None:
+    assert maximal_marginal_relevance(np.array([1.0, 0.0]), [], k=4) == []
+    assert maximal_marginal_relevance(np.array([1.0, 0.0]), [[1.0, 0.0]], k=0) == []
+
+
+@pytest.mark.parametrize(
+    "lambda_mult, expected",
+    [
+        # Pure relevance: closest candidates first.
+        (1.0, [0, 1, 2]),
+        # Favor diversity: the near-duplicate of the first pick is selected last.
+        (0.25, [0, 2, 1]),
+    ],
+)
+def test_maximal_marginal_relevance(lambda_mult: float, expected) -> None:
+    query = np.array([1.0, 0.0], dtype=np.float32)
+    embeddings = [[1.0, 0.0], [0.99, 0.14], [0.7, 0.7]]
+    assert maximal_marginal_relevance(query, embeddings, lambda_mult=lambda_mult, k=3) == expected
+
+
+def test_maximal_marginal_relevance_accepts_stacked_array() -> None:
+    query = np.array([1.0, 0.0], dtype=np.float32)
+    embeddings = np.array([[0.0, 1.0], [0.8, 0.6], [1.0, 0.0]], dtype=np.float32)
+    original = embeddings.copy()
+
+    assert maximal_marginal_relevance(query, embeddings, lambda_mult=0.75, k=2) == [2, 1]
+    # The caller's array must not be normalized in place.
+    np.testing.assert_array_equal(embeddings, original)
+
+
+def test_pairwise_cosine_similarity_without_simsimd() -> None:
+    X = np.array([[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]], dtype=np.float32)
+    with patch("databricks_langchain.utils._get_simsimd", return_value=None):
+        np.testing.assert_allclose(_pairwise_cosine_similarity(X), X @ X.T)
+
+
+def test_pairwise_cosine_similarity_with_simsimd() -> None:
+    X = np.array([[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]], dtype=np.float32)
+
+    def cdist(A, B, metric):
+        assert metric == "cosine"
+        return 1 - A @ B.T
+
+    stub = SimpleNamespace(cdist=cdist)
+    with patch("databricks_langchain.utils._get_simsimd", return_value=stub):
+        similarity = _pairwise_cosine_similarity(X)
+    assert similarity.dtype == np.float32
+    np.testing.assert_allclose(similarity, X @ X.T, rtol=1e-6)
@@ -1,6 +1,7 @@
+import asyncio
 import uuid
 from typing import Any, Dict, List, Optional, Set
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from databricks.vector_search.client import VectorSearchIndex  # type: ignore
@@ -9,12 +10,18 @@ from databricks_ai_bridge.test_utils.vector_search import (  # noqa: F401
     DELTA_SYNC_INDEX,
     DIRECT_ACCESS_INDEX,
     ENDPOINT_NAME,
+    EXAMPLE_SEARCH_RESPONSE,
     INDEX_DETAILS,
     INPUT_TEXTS,
     mock_vs_client,  # noqa: F401
 )
 
-from databricks_langchain.vectorstores import DatabricksVectorSearch
+from databricks_langchain.vectorstores import (
+    DatabricksVectorSearch,
+    _copy_async_index,
+    _primary_key_filter,
+    _QueryCache,
+)
 from tests.utils.vector_search import (
     EMBEDDING_MODEL,
     FakeEmbeddings,
@@ -212,6 +219,36 @@ def test_add_texts_with_metadata() -> None:
     assert all([is_valid_uuid(id_) for id_ in added_ids])
 
 
+def test_add_texts_in_batches() -> None:
+    vectorsearch = init_vector_search(DIRECT_ACCESS_INDEX)
+    vectorsearch.index.upsert.side_effect = [
+        {"status": "SUCCESS"},
+        {"status": "PARTIAL_SUCCESS", "result": {"failed_primary_keys": [2]}},
+    ]
+    ids = list(range(len(INPUT_TEXTS)))
+
+    with patch.object(
+        EMBEDDING_MODEL, "embed_documents", wraps=EMBEDDING_MODEL.embed_documents
+    ) as mock_embed:
+        added_ids = vectorsearch.add_texts(
+            INPUT_TEXTS, ids=ids, embedding_batch_size=2, upsert_batch_size=2
+        )
+
+    assert [c.args[0] for c in mock_embed.call_args_list] == [INPUT_TEXTS[:2], INPUT_TEXTS[2:]]
+    assert [len(c.args[0]) for c in vectorsearch.index.upsert.call_args_list] == [2, 1]
+    assert added_ids == [0, 1]
+
+
+def test_aadd_texts_forwards_ids() -> None:
+    vectorsearch = init_vector_search(DIRECT_ACCESS_INDEX)
+    ids = [idx for idx, i in enumerate(INPUT_TEXTS)]
+
+    added_ids = asyncio.run(vectorsearch.aadd_texts(INPUT_TEXTS, ids=ids))
+
+    assert added_ids == ids
+    assert [row["id"] for row in vectorsearch.index.upsert.call_args[0][0]] == ids
+
+
 @pytest.mark.parametrize("index_name", ALL_INDEX_NAMES - {DELTA_SYNC_INDEX})
 def test_embeddings_property(index_name: str) -> None:
     vectorsearch = init_vector_search(index_name)
@@ -304,6 +341,121 @@ def test_similarity_search_hybrid(index_name: str) -> None:
     assert all(["id" in d.metadata for d in search_result])
 
 
+def test_similarity_search_with_cache() -> None:
+    vectorsearch = DatabricksVectorSearch(
+        index_name=DIRECT_ACCESS_INDEX,
+        embedding=EMBEDDING_MODEL,
+        text_column="text",
+        cache_config={"max_size": 2},
+    )
+    with patch.object(
+        EMBEDDING_MODEL, "embed_query", wraps=EMBEDDING_MODEL.embed_query
+    ) as mock_embed:
+        first = vectorsearch.similarity_search("foo", k=3)
+        second = vectorsearch.similarity_search("foo", k=3)
+        assert mock_embed.call_count == 1
+
+    assert first == second
+    assert vectorsearch.index.similarity_search.call_count == 1
+
+    # A different request misses the cache.
+    vectorsearch.similarity_search("foo", k=3, filter={"some filter": True})
+    assert vectorsearch.index.similarity_search.call_count == 2
+
+    # Writes to the index invalidate cached search responses.
+    vectorsearch.delete(["some id"])
+    vectorsearch.similarity_search("foo", k=3)
+    assert vectorsearch.index.similarity_search.call_count == 3
+
+
+def test_similarity_search_cache_disabled() -> None:
+    vectorsearch = DatabricksVectorSearch(
+        index_name=DIRECT_ACCESS_INDEX,
+        embedding=EMBEDDING_MODEL,
+        text_column="text",
+        cache_config={"enabled": False},
+    )
+    vectorsearch.similarity_search("foo", k=3)
+    vectorsearch.similarity_search("foo", k=3)
+    assert vectorsearch.index.similarity_search.call_count == 2
+
+
+def test_query_cache_eviction_and_expiry() -> None:
+    cache = _QueryCache(max_size=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    # "b" is the least recently used entry.
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    with patch("databricks_langchain.vectorstores.time.monotonic", return_value=float("inf")):
+        assert cache.get("a") is None
+
+
+@pytest.mark.parametrize("index_name", ALL_INDEX_NAMES)
+def test_asimilarity_search_uses_async_index(index_name: str) -> None:
+    vectorsearch = init_vector_search(index_name)
+    async_index = MagicMock()
+    async_index.similarity_search = AsyncMock(return_value=EXAMPLE_SEARCH_RESPONSE)
+    vectorsearch._client.get_async_index.return_value = async_index
+
+    search_result = asyncio.run(vectorsearch.asimilarity_search("foo", k=7))
+
+    vectorsearch._client.get_async_index.assert_called_once_with(
+        endpoint_name=None, index_name=index_name
+    )
+    vectorsearch.index.similarity_search.assert_not_called()
+    async_index.similarity_search.assert_awaited_once()
+    assert async_index.similarity_search.call_args.kwargs["num_results"] == 7
+    assert sorted([d.page_content for d in search_result]) == sorted(INPUT_TEXTS)
+
+
+def test_asimilarity_search_resolves_async_index_once() -> None:
+    vectorsearch = init_vector_search(DIRECT_ACCESS_INDEX)
+    async_index = MagicMock()
+    async_index.similarity_search = AsyncMock(return_value=EXAMPLE_SEARCH_RESPONSE)
+    vectorsearch._client.get_async_index.return_value = async_index
+
+    async def search_concurrently_then_again():
+        await asyncio.gather(*(vectorsearch.asimilarity_search("foo") for _ in range(3)))
+        await vectorsearch.asimilarity_search("foo")
+
+    asyncio.run(search_concurrently_then_again())
+    vectorsearch._client.get_async_index.assert_called_once()
+    assert async_index.similarity_search.await_count == 4
+
+    # A new event loop gets its own async index without resolving the index again.
+    asyncio.run(vectorsearch.asimilarity_search("foo"))
+    vectorsearch._client.get_async_index.assert_called_once()
+    assert async_index.similarity_search.await_count == 5
+
+
+def test_copy_async_index_replaces_asyncio_locks() -> None:
+    async_index = MagicMock()
+    async_index.name = "index"
+    async_index.lock = asyncio.Lock()
+
+    copied = _copy_async_index(async_index)
+
+    assert copied is not async_index
+    assert copied.name == "index"
+    assert isinstance(copied.lock, asyncio.Lock)
+    assert copied.lock is not async_index.lock
+
+
+def test_asimilarity_search_without_async_client() -> None:
+    vectorsearch = init_vector_search(DIRECT_ACCESS_INDEX)
+    del vectorsearch._client.get_async_index
+
+    search_result = asyncio.run(vectorsearch.asimilarity_search("foo", k=7))
+
+    vectorsearch.index.similarity_search.assert_called_once()
+    assert sorted([d.page_content for d in search_result]) == sorted(INPUT_TEXTS)
+
+
 def test_similarity_search_passing_kwargs() -> None:
     vectorsearch = init_vector_search(DELTA_SYNC_INDEX)
     query = "foo"
@@ -352,6 +504,119 @@ def test_mmr_search(
     assert [set(doc.metadata.keys()) for doc in search_result] == [expected_columns]
 
 
+def test_mmr_search_returns_documents_in_selection_order() -> None:
+    vectorsearch = init_vector_search(DIRECT_ACCESS_INDEX)
+    rows = EXAMPLE_SEARCH_RESPONSE["result"]["data_array"]
+
+    with patch("databricks_langchain.vectorstores.maximal_marginal_relevance") as mock_mmr:
+        mock_mmr.return_value = [2, 0]
+        search_result = vectorsearch.max_marginal_relevance_search(INPUT_TEXTS[0], k=2)
+
+    assert [doc.page_content for doc in search_result] == [rows[2][1], rows[0][1]]
+
+
+def test_mmr_search_with_vector_cache() -> None:
+    vectorsearch = DatabricksVectorSearch(
+        index_name=DIRECT_ACCESS_INDEX,
+        embedding=EMBEDDING_MODEL,
+        text_column="text",
+        vector_cache_size=10,
+    )
+    rows = EXAMPLE_SEARCH_RESPONSE["result"]["data_array"]
+    vectorsearch.add_texts([row[1] for row in rows], ids=[row[0] for row in rows])
+
+    search_result = vectorsearch.max_marginal_relevance_search(INPUT_TEXTS[0], k=1)
+
+    # All candidate vectors are cached, so the embedding column is not requested.
+    vectorsearch.index.similarity_search.assert_called_once()
+    assert vectorsearch.index.similarity_search.call_args[1]["columns"] == ["id", "text"]
+    assert len(search_result) == 1
+
+    # Only the missing vector is fetched, by primary key.
+    vectorsearch.delete([rows[0][0]])
+    vectorsearch.max_marginal_relevance_search(INPUT_TEXTS[0], k=1)
+    assert vectorsearch.index.similarity_search.call_count == 3
+    fetch_kwargs = vectorsearch.index.similarity_search.call_args[1]
+    assert fetch_kwargs["columns"] == ["id", "text_vector"]
+    assert fetch_kwargs["filters"] == {"id": [rows[0][0]]}
+    assert fetch_kwargs["num_results"] == 1
+
+
+def test_mmr_search_with_vector_cache_misses() -> None:
+    vectorsearch = DatabricksVectorSearch(
+        index_name=DIRECT_ACCESS_INDEX,
+        embedding=EMBEDDING_MODEL,
+        text_column="text",
+        vector_cache_size=10,
+    )
+    rows = EXAMPLE_SEARCH_RESPONSE["result"]["data_array"]
+    vectorsearch.add_texts([rows[0][1]], ids=[rows[0][0]])
+    search = vectorsearch.index.similarity_search
+
+    # Most candidates are missing: their vectors are fetched, then the next search requests
+    # the embedding column up front.
+    vectorsearch.max_marginal_relevance_search(INPUT_TEXTS[0], k=1)
+    assert search.call_count == 2
+    vectorsearch.max_marginal_relevance_search(INPUT_TEXTS[0], k=1)
+    assert search.call_count == 3
+    assert "text_vector" in search.call_args[1]["columns"]
+
+    # Once most candidates are cached, the cache is used again.
+    vectorsearch.add_texts([row[1] for row in rows], ids=[row[0] for row in rows])
+    vectorsearch.max_marginal_relevance_search(INPUT_TEXTS[0], k=1)
+    vectorsearch.max_marginal_relevance_search(INPUT_TEXTS[0], k=1)
+    assert search.call_count == 5
+    assert search.call_args[1]["columns"] == ["id", "text"]
+
+
+def test_primary_key_filter() -> None:
+    assert _primary_key_filter("id", ["a", 1], None) == {"id": ["a", 1]}
+    assert _primary_key_filter("id", ["a", 1], {"x": 1}) == {"id": ["a", 1]}
+    assert _primary_key_filter("id", ["it's", 1], "x > 1") == "id IN ('it''s', 1)"
+
+
+@pytest.mark.parametrize("mmr_precision", ["fp32", "fp16", "int8"])
+def test_mmr_search_with_vector_cache_precision(mmr_precision: str) -> None:
+    vectorsearch = DatabricksVectorSearch(
+        index_name=DIRECT_ACCESS_INDEX,
+        embedding=EMBEDDING_MODEL,
+        text_column="text",
+        vector_cache_size=10,
+        mmr_precision=mmr_precision,
+    )
+    # Cache the same vectors as the ones in the search response.
+    ids = {row[1]: row[0] for row in EXAMPLE_SEARCH_RESPONSE["result"]["data_array"]}
+    vectorsearch.add_texts(INPUT_TEXTS, ids=[ids[text] for text in INPUT_TEXTS])
+
+    search_result = vectorsearch.max_marginal_relevance_search(INPUT_TEXTS[0], k=3)
+    vectorsearch.index.similarity_search.assert_called_once()
+    expected = init_vector_search(DIRECT_ACCESS_INDEX).max_marginal_relevance_search(
+        INPUT_TEXTS[0], k=3
+    )
+    assert search_result == expected
+
+
+def test_init_fail_invalid_mmr_precision() -> None:
+    with pytest.raises(ValueError, match="The `mmr_precision` parameter must be one of"):
+        DatabricksVectorSearch(
+            index_name=DIRECT_ACCESS_INDEX,
+            embedding=EMBEDDING_MODEL,
+            text_column="text",
+            mmr_precision="fp8",  # type: ignore[arg-type]
+        )
+
+
+@pytest.mark.parametrize("mmr_precision", ["fp16", "int8"])
+def test_init_fail_mmr_precision_without_vector_cache(mmr_precision: str) -> None:
+    with pytest.raises(ValueError, match="The `mmr_precision` parameter only applies"):
+        DatabricksVectorSearch(
+            index_name=DIRECT_ACCESS_INDEX,
+            embedding=EMBEDDING_MODEL,
+            text_column="text",
+            mmr_precision=mmr_precision,  # type: ignore[arg-type]
+        )
+
+
 @pytest.mark.parametrize("index_name", ALL_INDEX_NAMES - {DELTA_SYNC_INDEX})
 def test_mmr_parameters(index_name: str) -> None:
     vectorsearch = init_vector_search(index_name)
@@ -497,3 +762,19 @@ def test_similarity_search_by_vector_not_supported_for_managed_embedding() -> No
 
     with pytest.raises(NotImplementedError, match="`similarity_search_by_vector` is not supported"):
         vectorsearch.similarity_search_by_vector(query_embedding, k=limit, filters=filters)
+
+
+def test_isimilarity_search_yields_pages() -> None:
+    vectorsearch = init_vector_search(DIRECT_ACCESS_INDEX)
+    expected = vectorsearch.similarity_search("foo", k=3)
+
+    docs = vectorsearch.isimilarity_search("foo", k=3, page_size=2)
+    assert not isinstance(docs, list)
+    assert list(docs) == expected
+    assert vectorsearch.index.similarity_search.call_count == 2
+
+
+def test_isimilarity_search_invalid_page_size() -> None:
+    vectorsearch = init_vector_search(DIRECT_ACCESS_INDEX)
+    with pytest.raises(ValueError, match="`page_size` must be a positive integer"):
+        vectorsearch.isimilarity_search("foo", page_size=0)
@@ -1,24 +1,103 @@
-import bisect
+import functools
+import itertools
 import logging
+import os
 import time
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date
 from typing import Optional, Union, Any
 import json
 
 import mlflow
+import numpy as np
+import orjson
 import pandas as pd
 import tiktoken
 from databricks.sdk import WorkspaceClient
 
 MAX_TOKENS_OF_DATA = 20000
 MAX_ITERATIONS = 50
+# Longest wait between two polls, in seconds. A poll gives up after waiting MAX_ITERATIONS of them.
+_MAX_POLL_INTERVAL = 5.0
+SPACE_DESCRIPTION_TTL_SECONDS = 600
+# Number of rows first rendered when a query result is too long to fit in MAX_TOKENS_OF_DATA
+_INITIAL_ROW_BUDGET = 1024
+_IN_PROGRESS_QUERY_STATES = frozenset({"RUNNING", "PENDING"})
+_STOPPED_MESSAGE_STATUSES = frozenset({"CANCELLED", "QUERY_RESULT_EXPIRED"})
+_EPOCH = date(1970, 1, 1)
+# Whether to also trace the internal helpers of the public Genie methods
+_TRACE_INTERNALS = os.environ.get("DATABRICKS_AI_BRIDGE_TRACE", "false").lower() in ("true", "1")
+_BOOLEAN_LITERALS = {
+    "true": True,
+    "True": True,
+    "TRUE": True,
+    "false": False,
+    "False": False,
+    "FALSE": False,
+}
+
+
+def _trace_internal(**trace_kwargs):
+    """Like ``mlflow.trace``, but only traces when DATABRICKS_AI_BRIDGE_TRACE is enabled.
+
+    Used on the helpers called many times per public method call, whose spans can cost more
+    than the work they trace.
+    """
+    if _TRACE_INTERNALS:
+        return mlflow.trace(**trace_kwargs)
+    return lambda func: func
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding:
+    # Loading the BPE ranks and compiling the regex is expensive, so only do it once per process.
+    return tiktoken.encoding_for_model("gpt-4o")
 
 
 # Define a function to count tokens
 def _count_tokens(text):
-    encoding = tiktoken.encoding_for_model("gpt-4o")
-    return len(encoding.encode(text))
+    return len(_get_encoding().encode(text))
+
+
+def _count_tokens_batch(texts: list[str]) -> list[int]:
+    # encode_batch tokenizes on a thread pool in the Rust core, which is much cheaper than
+    # one encode call per string for many short strings.
+    return [len(tokens) for tokens in _get_encoding().encode_batch(texts, num_threads=8)]
+
+
+def _to_json_default(value: Any) -> Any:
+    # Serialize the values orjson does not handle natively like pandas' to_json does
+    if isinstance(value, date):
+        return (value - _EPOCH).days * 86_400_000
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _to_json_records(
+    columns: list[dict[str, Any]],
+    data_array: list[list[Any]],
+    json_kwargs: Optional[dict[str, Any]] = None,
+) -> Optional[list[str]]:
+    """Serialize each row of the default records layout with orjson, without a DataFrame.
+
+    Returns None when the layout is customized through `json_kwargs`, in which case pandas'
+    to_json has to be used.
+    """
+    header = [str(col["name"]) for col in columns]
+    if json_kwargs != {"orient": "records"} or len(set(header)) != len(header):
+        return None
+    # Same values as DataFrame.to_dict("records") would give for the converted columns
+    values = [
+        column.tolist() if isinstance(column, np.ndarray) else column
+        for column in _convert_columns(columns, data_array)
+    ]
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+    return [
+        orjson.dumps(dict(zip(header, row)), default=_to_json_default, option=option).decode()
+        for row in zip(*values)
+    ]
+
 
 def _to_json_string(data: pd.DataFrame, json_kwargs: Optional[dict[str, Any]] = None) -> str:
     if data.empty:
@@ -26,6 +105,87 @@ def _to_json_string(data: pd.DataFrame, json_kwargs: Optional[dict[str, Any]] =
     json_string = data.to_json(**json_kwargs)
     return json_string
 
+
+def _get_row_cutoff(row_tokens: list[int], base_tokens: int, num_rows: int, is_too_big) -> int:
+    """Return the largest number of leading rows whose rendering fits in MAX_TOKENS_OF_DATA.
+
+    The running sum of the per-row token counts gives an estimate of the cutoff without
+    rendering anything. ``is_too_big(n)`` is then only called on a few prefixes around that
+    estimate to find the exact cutoff, so a non-zero cutoff has always been checked to fit.
+    Assumes that the full result is already known to be too big.
+    """
+    row_tokens = np.asarray(row_tokens, dtype=np.float64)
+    if len(row_tokens) != num_rows:
+        # Multi-line cells break the row/line correspondence, so spread the cost evenly.
+        row_tokens = np.full(num_rows, row_tokens.sum() / num_rows)
+    # cumulative[i] is the estimated size of the first i + 1 rows
+    cumulative = base_tokens + np.cumsum(row_tokens)
+    estimate = min(int(np.searchsorted(cumulative, MAX_TOKENS_OF_DATA, side="right")), num_rows - 1)
+
+    def fits(n):
+        return n == 0 or not is_too_big(n)
+
+    # Gallop away from the estimate until the cutoff is bracketed, such that the first `lo`
+    # rows fit and the first `hi` rows do not, then binary search in between.
+    lo, hi = 0, num_rows
+    step = 1
+    if fits(estimate):
+        lo = estimate
+        while lo + step < hi:
+            if not fits(lo + step):
+                hi = lo + step
+                break
+            lo += step
+            step *= 2
+    else:
+        hi = estimate
+        while hi - step > lo:
+            if fits(hi - step):
+                lo = hi - step
+                break
+            hi -= step
+            step *= 2
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _backoff_intervals(
+    total: float, initial: float = 0.2, factor: float = 1.5, max_interval: float = _MAX_POLL_INTERVAL
+):
+    """Yield polling intervals in seconds, growing exponentially up to `max_interval`.
+
+    The intervals add up to exactly `total`, so that backing off does not change how long a
+    caller waits in total before giving up.
+    """
+    interval = initial
+    while total > 0:
+        yield min(interval, total)
+        total -= interval
+        interval = min(interval * factor, max_interval)
+
+
+@functools.lru_cache(maxsize=1)
+def _default_workspace_client() -> WorkspaceClient:
+    # Resolving the configuration and authenticating is expensive, so share one client
+    return WorkspaceClient()
+
+
+@functools.lru_cache(maxsize=128)
+def _get_cached_space_description(space_id: str, ttl_bucket: int) -> Optional[str]:
+    return _default_workspace_client().genie.get_space(space_id).description
+
+
+def _get_space_description(space_id: str) -> Optional[str]:
+    """Return the description of a Genie space, fetched at most once per TTL window."""
+    ttl_bucket = int(time.monotonic() // SPACE_DESCRIPTION_TTL_SECONDS)
+    return _get_cached_space_description(space_id, ttl_bucket)
+
+
 @dataclass
 class GenieResponse:
     result: Union[str, list[dict[str, Any]], pd.DataFrame]
@@ -34,139 +194,227 @@ class GenieResponse:
     conversation_id: Optional[str] = None
 
 
-@mlflow.trace(span_type="PARSER")
-def _parse_query_result(resp) -> Union[str, pd.DataFrame]:
-    output = resp["result"]
-    if not output:
-        return "EMPTY"
+def _convert_integers(values: list) -> Any:
+    return pd.to_numeric(values)
 
-    columns = resp["manifest"]["schema"]["columns"]
+
+def _convert_floats(values: list) -> Any:
+    return np.array(values, dtype=np.float64)
+
+
+def _parse_boolean(value: Any) -> bool:
+    # The usual spellings are looked up as they are, without lowercasing a copy of them
+    parsed = _BOOLEAN_LITERALS.get(value)
+    return str(value).lower() == "true" if parsed is None else parsed
+
+
+def _convert_booleans(values: list) -> Any:
+    if None not in values:
+        return np.fromiter(map(_parse_boolean, values), dtype=bool, count=len(values))
+    return np.array(
+        [None if value is None else _parse_boolean(value) for value in values], dtype=object
+    )
+
+
+def _convert_dates(values: list) -> Any:
+    # Only the date part is kept, which numpy parses straight into days. Converting back to
+    # objects yields datetime.date values, and None for nulls.
+    days = np.array(
+        [None if value is None else value[:10] for value in values], dtype="datetime64[D]"
+    )
+    return days.astype(object)
+
+
+def _convert_binary(values: list) -> Any:
+    return [None if value is None else bytes(value, "utf-8") for value in values]
+
+
+_INT_TYPES = frozenset({"INT", "LONG", "SHORT", "BYTE"})
+_FLOAT_TYPES = frozenset({"FLOAT", "DOUBLE", "DECIMAL"})
+_DATE_TYPES = frozenset({"DATE", "TIMESTAMP"})
+
+# Column converters by type name, other types are kept as strings
+_COLUMN_CONVERTERS = {
+    **dict.fromkeys(_INT_TYPES, _convert_integers),
+    **dict.fromkeys(_FLOAT_TYPES, _convert_floats),
+    **dict.fromkeys(_DATE_TYPES, _convert_dates),
+    "BOOLEAN": _convert_booleans,
+    "BINARY": _convert_binary,
+}
+
+
+def _convert_column(converter, values: list) -> Any:
+    """Convert the raw values of a result column, where None marks a null value.
+
+    Nulls are kept as None (NaN for numbers), so that the resulting dtypes are the same as when
+    pandas infers them from the converted Python values.
+    """
+    if converter is None or values.count(None) == len(values):
+        return values
+    return converter(values)
+
+
+def _convert_columns(columns: list[dict[str, Any]], data_array: list[list[Any]]) -> list[Any]:
+    """Convert a query result one column at a time."""
+    # Resolve the converter of each column once, instead of dispatching on its type per value
+    converters = [_COLUMN_CONVERTERS.get(column["type_name"]) for column in columns]
+    return [
+        _convert_column(converter, list(values))
+        for converter, values in zip(converters, zip(*data_array))
+    ]
+
+
+def _to_dataframe(columns: list[dict[str, Any]], data_array: list[list[Any]]) -> pd.DataFrame:
+    """Build the DataFrame of a query result."""
     header = [str(col["name"]) for col in columns]
-    rows = []
-
-    for item in output["data_array"]:
-        row = []
-        for column, value in zip(columns, item):
-            type_name = column["type_name"]
-            if value is None:
-                row.append(None)
-                continue
-
-            if type_name in ["INT", "LONG", "SHORT", "BYTE"]:
-                row.append(int(value))
-            elif type_name in ["FLOAT", "DOUBLE", "DECIMAL"]:
-                row.append(float(value))
-            elif type_name == "BOOLEAN":
-                row.append(value.lower() == "true")
-            elif type_name == "DATE" or type_name == "TIMESTAMP":
-                row.append(datetime.strptime(value[:10], "%Y-%m-%d").date())
-            elif type_name == "BINARY":
-                row.append(bytes(value, "utf-8"))
-            else:
-                row.append(value)
-
-        rows.append(row)
-
-    dataframe = pd.DataFrame(rows, columns=header)
-    query_result = dataframe.to_markdown()
-    tokens_used = _count_tokens(query_result)
-
-    # If the full result fits, return it
-    if tokens_used <= MAX_TOKENS_OF_DATA:
-        return query_result.strip()
+    if not data_array:
+        return pd.DataFrame([], columns=header)
 
-    def is_too_big(n):
-        return _count_tokens(dataframe.iloc[:n].to_markdown()) > MAX_TOKENS_OF_DATA
+    dataframe = pd.DataFrame(dict(enumerate(_convert_columns(columns, data_array))))
+    dataframe.columns = header
+    return dataframe
 
-    # Use bisect_left to find the cutoff point of rows within the max token data limit in a O(log n) complexity
-    # Passing True, as this is the target value we are looking for when _is_too_big returns
-    cutoff = bisect.bisect_left(range(len(dataframe) + 1), True, key=is_too_big)
 
-    # Slice to the found limit
-    truncated_df = dataframe.iloc[:cutoff]
+class _MarkdownRendering:
+    """Renders a query result as a markdown table."""
 
-    # Edge case: Cannot return any rows because of tokens so return an empty string
-    if len(truncated_df) == 0:
-        return ""
+    def __init__(self, columns: list[dict[str, Any]], data_array: list[list[Any]]):
+        self.dataframe = _to_dataframe(columns, data_array)
+        self.text = self.dataframe.to_markdown()
 
-    truncated_result = truncated_df.to_markdown()
+    def render(self, n: int) -> str:
+        """Render the first n rows."""
+        return self.dataframe.iloc[:n].to_markdown()
 
-    # Double-check edge case if we overshot by one
-    if _count_tokens(truncated_result) > MAX_TOKENS_OF_DATA:
-        truncated_result = truncated_df.iloc[:-1].to_markdown()
+    def estimate_tokens(self) -> tuple[list[int], int]:
+        """Estimate the tokens of each row, and of the parts that are only rendered once."""
+        # Each row is a line of the full table, below the header and separator lines
+        lines = self.text.splitlines()
+        return _count_tokens_batch(lines[2:]), _count_tokens("\n".join(lines[:2]))
 
-    return truncated_result.strip()
 
-@mlflow.trace(span_type="PARSER")
-def _parse_query_result_json(resp, json_kwargs: Optional[dict[str, Any]] = None) -> Union[str, pd.DataFrame]:
+class _JsonRendering:
+    """Renders a query result as JSON, laid out according to `json_kwargs`."""
+
+    def __init__(
+        self,
+        columns: list[dict[str, Any]],
+        data_array: list[list[Any]],
+        json_kwargs: Optional[dict[str, Any]] = None,
+    ):
+        self.json_kwargs = json_kwargs
+        self.records = (
+            _to_json_records(columns, data_array, json_kwargs) if columns and data_array else None
+        )
+        if self.records is not None:
+            # The records are serialized straight from the converted columns
+            self.dataframe = None
+            self.text = "[" + ",".join(self.records) + "]"
+        else:
+            self.dataframe = _to_dataframe(columns, data_array)
+            self.text = _to_json_string(self.dataframe, json_kwargs)
+
+    @functools.cached_property
+    def _offsets(self) -> list[int]:
+        # _offsets[n] is where the n-th record ends in the full text
+        return list(itertools.accumulate((len(record) + 1 for record in self.records), initial=1))
+
+    def render(self, n: int) -> str:
+        """Render the first n rows."""
+        if self.records is None:
+            return _to_json_string(self.dataframe.iloc[:n], self.json_kwargs)
+        # Records are rendered independently of each other, so every prefix of the result is a
+        # slice of the full text and does not need to be serialized again
+        return self.text[: self._offsets[n] - 1] + "]" if n else ""
+
+    def estimate_tokens(self) -> tuple[list[int], int]:
+        """Estimate the tokens of each row, and of the parts that are only rendered once."""
+        if self.records is not None:
+            return _count_tokens_batch(self.records), _count_tokens("[]")
+        # Estimate the cost of each row from its values alone, which does not depend on the
+        # column names being unique nor repeat them on every row like a record would, and the
+        # cost of the column names from a single list of them
+        rows = json.loads(self.dataframe.to_json(orient="values"))
+        lines = [json.dumps(row, separators=(",", ":")) for row in rows]
+        header = json.dumps([str(name) for name in self.dataframe.columns])
+        return _count_tokens_batch(lines), _count_tokens(header)
+
+
+def _parse_and_truncate(resp, rendering_cls) -> str:
+    """Render a query result, keeping as many leading rows as fit in MAX_TOKENS_OF_DATA."""
     output = resp["result"]
     if not output:
         return "EMPTY"
 
     columns = resp["manifest"]["schema"]["columns"]
-    header = [str(col["name"]) for col in columns]
-    rows = []
-
-    for item in output["data_array"]:
-        row = []
-        for column, value in zip(columns, item):
-            type_name = column["type_name"]
-            if value is None:
-                row.append(None)
-                continue
-
-            if type_name in ["INT", "LONG", "SHORT", "BYTE"]:
-                row.append(int(value))
-            elif type_name in ["FLOAT", "DOUBLE", "DECIMAL"]:
-                row.append(float(value))
-            elif type_name == "BOOLEAN":
-                row.append(value.lower() == "true")
-            elif type_name == "DATE" or type_name == "TIMESTAMP":
-                row.append(datetime.strptime(value[:10], "%Y-%m-%d").date())
-            elif type_name == "BINARY":
-                row.append(bytes(value, "utf-8"))
-            else:
-                row.append(value)
-
-        rows.append(row)
-
-    dataframe = pd.DataFrame(rows, columns=header)
-    query_result = _to_json_string(dataframe, json_kwargs)
-    tokens_used = _count_tokens(query_result)
-
-    # If the full result fits, return it
-    if tokens_used <= MAX_TOKENS_OF_DATA:
-        return query_result.strip()
+    data_array = output["data_array"]
+    if len(data_array) > MAX_TOKENS_OF_DATA:
+        # Every row takes at least one token, so such a result never fits and only a prefix of
+        # it is returned. Grow the prefix until it is too big, so that the rows after it are
+        # never converted nor rendered.
+        num_rows = _INITIAL_ROW_BUDGET
+        while num_rows <= MAX_TOKENS_OF_DATA:
+            rendering = rendering_cls(columns, data_array[:num_rows])
+            if _count_tokens(rendering.text) > MAX_TOKENS_OF_DATA:
+                break
+            num_rows *= 2
+        else:
+            num_rows = MAX_TOKENS_OF_DATA + 1
+            rendering = rendering_cls(columns, data_array[:num_rows])
+    else:
+        num_rows = len(data_array)
+        rendering = rendering_cls(columns, data_array)
+        query_result = rendering.text
+        # A token always spans at least one byte, so a short enough result fits without
+        # tokenizing it
+        if len(query_result.encode("utf-8")) <= MAX_TOKENS_OF_DATA:
+            return query_result.strip()
+
+        tokens_used = _count_tokens(query_result)
+
+        # If the full result fits, return it
+        if tokens_used <= MAX_TOKENS_OF_DATA:
+            return query_result.strip()
+
+    # Prefixes rendered while searching for the cutoff, so that the returned one is not
+    # rendered twice
+    rendered = {}
 
     def is_too_big(n):
-        return _count_tokens(_to_json_string(dataframe.iloc[:n], json_kwargs)) > MAX_TOKENS_OF_DATA
+        rendered[n] = rendering.render(n)
+        return _count_tokens(rendered[n]) > MAX_TOKENS_OF_DATA
 
-    # Use bisect_left to find the cutoff point of rows within the max token data limit in a O(log n) complexity
-    # Passing True, as this is the target value we are looking for when _is_too_big returns
-    cutoff = bisect.bisect_left(range(len(dataframe) + 1), True, key=is_too_big)
-
-    # Slice to the found limit
-    truncated_df = dataframe.iloc[:cutoff]
+    row_tokens, base_tokens = rendering.estimate_tokens()
+    cutoff = _get_row_cutoff(row_tokens, base_tokens, num_rows, is_too_big)
 
     # Edge case: Cannot return any rows because of tokens so return an empty string
-    if len(truncated_df) == 0:
+    if cutoff == 0:
         return ""
 
-    truncated_result = _to_json_string(truncated_df, json_kwargs)
+    return rendered[cutoff].strip()
+
 
-    # Double-check edge case if we overshot by one
-    if _count_tokens(truncated_result) > MAX_TOKENS_OF_DATA:
-        truncated_result = _to_json_string(truncated_df.iloc[:-1])
+@_trace_internal(span_type="PARSER")
+def _parse_query_result(resp) -> Union[str, pd.DataFrame]:
+    return _parse_and_truncate(resp, _MarkdownRendering)
 
-    return truncated_result.strip()
+
+@_trace_internal(span_type="PARSER")
+def _parse_query_result_json(resp, json_kwargs: Optional[dict[str, Any]] = None) -> Union[str, pd.DataFrame]:
+    return _parse_and_truncate(resp, functools.partial(_JsonRendering, json_kwargs=json_kwargs))
 
 
 class Genie:
     def __init__(self, space_id, client: Optional["WorkspaceClient"] = None):
         self.space_id = space_id
-        workspace_client = client or WorkspaceClient()
-        self.genie = workspace_client.genie
-        self.description = self.genie.get_space(space_id).description
+        if client is None:
+            # Genie instances without an explicit client share the default client and the space
+            # descriptions it fetched
+            self.genie = _default_workspace_client().genie
+            self.description = _get_space_description(space_id)
+        else:
+            self.genie = client.genie
+            self.description = self.genie.get_space(space_id).description
         self.headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
@@ -194,16 +442,18 @@ class Genie:
 
     @mlflow.trace()
     def poll_for_result(self, conversation_id, message_id, return_data_as_json: bool = False, json_kwargs: Optional[dict[str, Any]] = None):
-        @mlflow.trace()
+        # The API client reuses its HTTP session across calls, so only resolve it once per poll
+        do = self.genie._api.do
+        headers = self.headers
+        conversations_url = f"/api/2.0/genie/spaces/{self.space_id}/conversations"
+        timeout = MAX_ITERATIONS * _MAX_POLL_INTERVAL
+
+        @_trace_internal()
         def poll_query_results(attachment_id, query_str, description, poll_conversation_id=conversation_id, parsing_as_json = False, parsing_json_kwargs=None):
-            iteration_count = 0
-            while iteration_count < MAX_ITERATIONS:
-                iteration_count += 1
-                resp = self.genie._api.do(
-                    "GET",
-                    f"/api/2.0/genie/spaces/{self.space_id}/conversations/{poll_conversation_id}/messages/{message_id}/attachments/{attachment_id}/query-result",
-                    headers=self.headers,
-                )["statement_response"]
+            query_result_url = f"{conversations_url}/{poll_conversation_id}/messages/{message_id}/attachments/{attachment_id}/query-result"
+            # Fast queries finish within a second, so start polling quickly and back off from there
+            for interval in _backoff_intervals(timeout):
+                resp = do("GET", query_result_url, headers=headers)["statement_response"]
                 state = resp["status"]["state"]
                 returned_conversation_id = resp.get("conversation_id", None)
                 if state == "SUCCEEDED":
@@ -219,30 +469,25 @@ class Genie:
                     else:
                         result = _parse_query_result(resp)
                     return GenieResponse(result, query_str, description, returned_conversation_id)
-                elif state in ["RUNNING", "PENDING"]:
+                elif state in _IN_PROGRESS_QUERY_STATES:
                     logging.debug("Waiting for query result...")
-                    time.sleep(5)
+                    time.sleep(interval)
                 else:
                     return GenieResponse(
                         f"No query result: {resp['state']}", query_str, description, returned_conversation_id
                     )
             return GenieResponse(
-                f"Genie query for result timed out after {MAX_ITERATIONS} iterations of 5 seconds",
+                f"Genie query for result timed out after waiting {timeout:g} seconds",
                 query_str,
                 description,
                 poll_conversation_id
             )
 
-        @mlflow.trace()
+        @_trace_internal()
         def poll_result():
-            iteration_count = 0
-            while iteration_count < MAX_ITERATIONS:
-                iteration_count += 1
-                resp = self.genie._api.do(
-                    "GET",
-                    f"/api/2.0/genie/spaces/{self.space_id}/conversations/{conversation_id}/messages/{message_id}",
-                    headers=self.headers,
-                )
+            message_url = f"{conversations_url}/{conversation_id}/messages/{message_id}"
+            for interval in _backoff_intervals(timeout):
+                resp = do("GET", message_url, headers=headers)
                 returned_conversation_id = resp.get("conversation_id", None)
                 if resp["status"] == "COMPLETED":
                     attachment = next((r for r in resp["attachments"] if "query" in r), None)
@@ -257,7 +502,7 @@ class Genie:
                             "content"
                         ]
                         return GenieResponse(result=text_content, conversation_id=returned_conversation_id)
-                elif resp["status"] in {"CANCELLED", "QUERY_RESULT_EXPIRED"}:
+                elif resp["status"] in _STOPPED_MESSAGE_STATUSES:
                     return GenieResponse(result=f"Genie query {resp['status'].lower()}.")
                 elif resp["status"] == "FAILED":
                     return GenieResponse(
@@ -266,9 +511,9 @@ class Genie:
                 # includes EXECUTING_QUERY, Genie can retry after this status
                 else:
                     logging.debug(f"Waiting...: {resp['status']}")
-                    time.sleep(5)
+                    time.sleep(interval)
             return GenieResponse(
-                f"Genie query timed out after {MAX_ITERATIONS} iterations of 5 seconds",
+                f"Genie query timed out after waiting {timeout:g} seconds",
                 conversation_id=conversation_id
             )
 
@@ -91,16 +91,30 @@ def get_metadata(
     Returns:
         Dict[str, Any]: A dictionary containing extracted metadata.
     """
-    metadata = {}
+    metadata_columns = _get_metadata_columns(columns, retriever_schema, ignore_cols, include_score)
+    return {key: result[i] for key, i in metadata_columns}
+
+
+def _get_metadata_columns(
+    columns: List[str],
+    retriever_schema: RetrieverSchema,
+    ignore_cols: List[str],
+    include_score: bool,
+) -> List[Tuple[str, int]]:
+    """
+    Resolve, once per response, which columns go into the metadata of each row.
+    Returns (metadata key, column position) pairs in column order.
+    """
+    metadata_columns = []
 
     if retriever_schema:
-        for col, value in zip(columns, result):
+        for i, col in enumerate(columns):
             if col == "score" and include_score:
-                metadata["score"] = value
+                metadata_columns.append(("score", i))
             elif col == retriever_schema.doc_uri:
-                metadata["doc_uri"] = value
+                metadata_columns.append(("doc_uri", i))
             elif col == retriever_schema.primary_key:
-                metadata["chunk_id"] = value
+                metadata_columns.append(("chunk_id", i))
             elif col == "doc_uri" and retriever_schema.doc_uri:
                 # Prioritize retriever_schema.doc_uri, don't override with the actual "doc_uri" column
                 continue
@@ -112,14 +126,14 @@ def get_metadata(
                 continue
             elif retriever_schema.other_columns is not None:
                 if col in retriever_schema.other_columns:
-                    metadata[col] = value
+                    metadata_columns.append((col, i))
             else:
-                metadata[col] = value
+                metadata_columns.append((col, i))
     else:
-        for col, value in zip(columns, result):
+        for i, col in enumerate(columns):
             if col not in ignore_cols:
-                metadata[col] = value
-    return metadata
+                metadata_columns.append((col, i))
+    return metadata_columns
 
 
 def parse_vector_search_response(
@@ -147,19 +161,26 @@ def parse_vector_search_response(
 
     ignore_cols.append(text_column)
 
-    columns = [col["name"] for col in search_resp.get("manifest", dict()).get("columns", [])]
-    docs_with_score = []
-
-    for result in search_resp.get("result", dict()).get("data_array", []):
-        page_content = result[columns.index(text_column)]
-
-        metadata = get_metadata(columns, result, retriever_schema, ignore_cols, include_score)
-
-        score = result[-1]
-        doc = document_class(page_content=page_content, metadata=metadata)
-        docs_with_score.append((doc, score))
-
-    return docs_with_score
+    manifest_cols = search_resp.get("manifest", dict()).get("columns", [])
+    rows = search_resp.get("result", dict()).get("data_array", [])
+    if not rows:
+        return []
+
+    # The column layout is shared by all rows, so resolve positions once per response.
+    columns = [col["name"] for col in manifest_cols]
+    text_idx = columns.index(text_column)
+    metadata_columns = _get_metadata_columns(columns, retriever_schema, ignore_cols, include_score)
+
+    return [
+        (
+            document_class(
+                page_content=row[text_idx],
+                metadata={key: row[i] for key, i in metadata_columns},
+            ),
+            row[-1],
+        )
+        for row in rows
+    ]
 
 
 def validate_and_get_text_column(text_column: Optional[str], index_details: IndexDetails) -> str:
@@ -1,19 +1,37 @@
+import itertools
+import json
 import random
 from datetime import datetime, timedelta
 from io import StringIO
-from unittest.mock import patch
+from unittest.mock import call, patch
 
 import pandas as pd
 import pytest
 
-from databricks_ai_bridge.genie import Genie, _count_tokens, _parse_query_result
+from databricks_ai_bridge.genie import (
+    Genie,
+    _convert_columns,
+    _count_tokens,
+    _default_workspace_client,
+    _get_cached_space_description,
+    _get_encoding,
+    _get_row_cutoff,
+    _MarkdownRendering,
+    _parse_query_result,
+    _parse_query_result_json,
+    _trace_internal,
+)
 
 
 @pytest.fixture
 def mock_workspace_client():
+    _default_workspace_client.cache_clear()
+    _get_cached_space_description.cache_clear()
     with patch("databricks_ai_bridge.genie.WorkspaceClient") as MockWorkspaceClient:
         mock_client = MockWorkspaceClient.return_value
         yield mock_client
+    _default_workspace_client.cache_clear()
+    _get_cached_space_description.cache_clear()
 
 
 @pytest.fixture
@@ -21,6 +39,22 @@ def genie(mock_workspace_client):
     return Genie(space_id="test_space_id")
 
 
+def test_genie_shares_default_client_and_space_description(mock_workspace_client):
+    mock_workspace_client.genie.get_space.return_value.description = "Sales data"
+    first = Genie(space_id="test_space_id")
+    second = Genie(space_id="test_space_id")
+
+    assert first.genie is second.genie is mock_workspace_client.genie
+    assert first.description == second.description == "Sales data"
+    mock_workspace_client.genie.get_space.assert_called_once_with("test_space_id")
+
+
+def test_genie_with_explicit_client(mock_workspace_client):
+    Genie(space_id="test_space_id", client=mock_workspace_client)
+    Genie(space_id="test_space_id", client=mock_workspace_client)
+    assert mock_workspace_client.genie.get_space.call_count == 2
+
+
 def test_start_conversation(genie, mock_workspace_client):
     mock_workspace_client.genie._api.do.return_value = {"conversation_id": "123"}
     response = genie.start_conversation("Hello")
@@ -76,6 +110,36 @@ def test_poll_for_result_completed_with_query(genie, mock_workspace_client):
     assert genie_result.result == pd.DataFrame().to_markdown()
 
 
+def test_poll_for_result_request_urls(genie, mock_workspace_client):
+    mock_workspace_client.genie._api.do.side_effect = [
+        {
+            "conversation_id": "789",
+            "status": "COMPLETED",
+            "attachments": [{"attachment_id": "abc", "query": {"query": "SELECT *"}}],
+        },
+        {
+            "statement_response": {
+                "status": {"state": "SUCCEEDED"},
+                "manifest": {"schema": {"columns": []}},
+                "result": {"data_array": []},
+            }
+        },
+    ]
+    genie.poll_for_result("123", "456")
+    assert mock_workspace_client.genie._api.do.call_args_list == [
+        call(
+            "GET",
+            "/api/2.0/genie/spaces/test_space_id/conversations/123/messages/456",
+            headers=genie.headers,
+        ),
+        call(
+            "GET",
+            "/api/2.0/genie/spaces/test_space_id/conversations/789/messages/456/attachments/abc/query-result",
+            headers=genie.headers,
+        ),
+    ]
+
+
 def test_poll_for_result_failed(genie, mock_workspace_client):
     mock_workspace_client.genie._api.do.side_effect = [
         {"status": "FAILED", "error": "Test error"},
@@ -104,15 +168,26 @@ def test_poll_for_result_max_iterations(genie, mock_workspace_client):
     # patch MAX_ITERATIONS to 2 for this test and sleep to avoid delays
     with (
         patch("databricks_ai_bridge.genie.MAX_ITERATIONS", 2),
-        patch("time.sleep", return_value=None),
+        patch("time.sleep", return_value=None) as mock_sleep,
     ):
-        mock_workspace_client.genie._api.do.side_effect = [
-            {"status": "EXECUTING_QUERY"},
-            {"status": "EXECUTING_QUERY"},
-            {"status": "EXECUTING_QUERY"},
-        ]
+        mock_workspace_client.genie._api.do.return_value = {"status": "EXECUTING_QUERY"}
+        result = genie.poll_for_result("123", "456")
+        assert result.result == "Genie query timed out after waiting 10 seconds"
+    # Backing off does not shorten the total wait of MAX_ITERATIONS intervals of 5 seconds
+    assert sum(call.args[0] for call in mock_sleep.call_args_list) == pytest.approx(10)
+
+
+def test_poll_for_result_backs_off(genie, mock_workspace_client):
+    mock_workspace_client.genie._api.do.side_effect = [
+        {"status": "EXECUTING_QUERY"},
+        {"status": "EXECUTING_QUERY"},
+        {"status": "EXECUTING_QUERY"},
+        {"status": "COMPLETED", "attachments": [{"text": {"content": "Answer"}}]},
+    ]
+    with patch("time.sleep", return_value=None) as mock_sleep:
         result = genie.poll_for_result("123", "456")
-        assert result.result == "Genie query timed out after 2 iterations of 5 seconds"
+    assert result.result == "Answer"
+    assert [call.args[0] for call in mock_sleep.call_args_list] == pytest.approx([0.2, 0.3, 0.45])
 
 
 def test_ask_question(genie, mock_workspace_client):
@@ -163,6 +238,18 @@ def test_ask_question_calls_create_once_and_not_start_on_continue(genie, mock_wo
         mock_start_conversation.assert_not_called()
 
 
+def test_count_tokens_reuses_encoding():
+    _get_encoding.cache_clear()
+    try:
+        with patch("databricks_ai_bridge.genie.tiktoken.encoding_for_model") as mock_for_model:
+            mock_for_model.return_value.encode.side_effect = lambda text: text.split()
+            assert _count_tokens("a b") == 2
+            assert _count_tokens("c d e") == 3
+        mock_for_model.assert_called_once_with("gpt-4o")
+    finally:
+        _get_encoding.cache_clear()
+
+
 def test_parse_query_result_empty():
     resp = {"manifest": {"schema": {"columns": []}}, "result": None}
     result = _parse_query_result(resp)
@@ -198,6 +285,151 @@ def test_parse_query_result_with_data():
     assert result == expected_df.to_markdown()
 
 
+def test_parse_query_result_converts_column_types():
+    resp = {
+        "manifest": {
+            "schema": {
+                "columns": [
+                    {"name": "flag", "type_name": "BOOLEAN"},
+                    {"name": "score", "type_name": "DOUBLE"},
+                    {"name": "day", "type_name": "DATE"},
+                    {"name": "raw", "type_name": "BINARY"},
+                ]
+            }
+        },
+        "result": {
+            "data_array": [
+                ["TRUE", "1.5", "2024-01-02", "ab"],
+                ["false", None, None, None],
+            ]
+        },
+    }
+    result = _parse_query_result(resp)
+    expected_df = pd.DataFrame(
+        {
+            "flag": [True, False],
+            "score": [1.5, None],
+            "day": [datetime(2024, 1, 2).date(), None],
+            "raw": [b"ab", None],
+        }
+    )
+    assert result == expected_df.to_markdown()
+
+
+@pytest.mark.parametrize("json_kwargs", [{"orient": "records"}, {"orient": "split"}])
+def test_parse_query_result_json_matches_pandas(json_kwargs):
+    columns = [
+        {"name": "id", "type_name": "INT"},
+        {"name": "score", "type_name": "DOUBLE"},
+        {"name": "flag", "type_name": "BOOLEAN"},
+        {"name": "day", "type_name": "DATE"},
+        {"name": "raw", "type_name": "BINARY"},
+        {"name": "name", "type_name": "STRING"},
+    ]
+    resp = {
+        "manifest": {"schema": {"columns": columns}},
+        "result": {
+            "data_array": [
+                ["1", "1.5", "true", "2024-01-02", "ab", "Alice"],
+                ["2", None, "false", None, None, None],
+            ]
+        },
+    }
+    expected_df = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "score": [1.5, None],
+            "flag": [True, False],
+            "day": [datetime(2024, 1, 2).date(), None],
+            "raw": [b"ab", None],
+            "name": ["Alice", None],
+        }
+    )
+    result = _parse_query_result_json(resp, json_kwargs)
+    assert json.loads(result) == json.loads(expected_df.to_json(**json_kwargs))
+
+
+def test_parse_query_result_skips_tokenizing_small_results():
+    resp = {
+        "manifest": {"schema": {"columns": [{"name": "id", "type_name": "INT"}]}},
+        "result": {"data_array": [["1"], ["2"]]},
+    }
+    with patch("databricks_ai_bridge.genie._count_tokens") as mock_count_tokens:
+        result = _parse_query_result(resp)
+    assert result == pd.DataFrame({"id": [1, 2]}).to_markdown()
+    mock_count_tokens.assert_not_called()
+
+
+@pytest.mark.parametrize("max_tokens", [100, 3000])
+def test_parse_query_result_only_converts_needed_rows(max_tokens):
+    data_array = [[str(i), f"Name {i}"] for i in range(5000)]
+    resp = {
+        "manifest": {
+            "schema": {
+                "columns": [
+                    {"name": "id", "type_name": "INT"},
+                    {"name": "name", "type_name": "STRING"},
+                ]
+            }
+        },
+        "result": {"data_array": data_array},
+    }
+    with (
+        patch("databricks_ai_bridge.genie.MAX_TOKENS_OF_DATA", max_tokens),
+        patch(
+            "databricks_ai_bridge.genie._convert_columns", wraps=_convert_columns
+        ) as mock_convert_columns,
+    ):
+        result = _parse_query_result(resp)
+
+    assert _count_tokens(result) <= max_tokens
+    assert len(result.splitlines()) > 2
+    for args, _ in mock_convert_columns.call_args_list:
+        assert len(args[1]) <= max_tokens + 1
+
+
+def test_parse_query_result_renders_each_prefix_once():
+    resp = {
+        "manifest": {"schema": {"columns": [{"name": "name", "type_name": "STRING"}]}},
+        "result": {"data_array": [[f"Name {i}"] for i in range(500)]},
+    }
+    with (
+        patch("databricks_ai_bridge.genie.MAX_TOKENS_OF_DATA", 300),
+        patch.object(
+            _MarkdownRendering, "render", autospec=True, side_effect=_MarkdownRendering.render
+        ) as mock_render,
+    ):
+        result = _parse_query_result(resp)
+
+    rendered_rows = [args[1] for args, _ in mock_render.call_args_list]
+    assert len(rendered_rows) == len(set(rendered_rows))
+    assert result == _MarkdownRendering.render(
+        _MarkdownRendering(resp["manifest"]["schema"]["columns"], resp["result"]["data_array"]),
+        len(result.splitlines()) - 2,
+    ).strip()
+
+
+@pytest.mark.parametrize("orient", ["split", "values"])
+def test_parse_query_result_json_trims_duplicate_column_names(orient):
+    resp = {
+        "manifest": {
+            "schema": {
+                "columns": [{"name": "id", "type_name": "INT"}, {"name": "id", "type_name": "INT"}]
+            }
+        },
+        "result": {"data_array": [[str(i), str(i + 1000)] for i in range(200)]},
+    }
+    with patch("databricks_ai_bridge.genie.MAX_TOKENS_OF_DATA", 300):
+        result = _parse_query_result_json(resp, {"orient": orient})
+
+    assert _count_tokens(result) <= 300
+    parsed = json.loads(result)
+    num_rows = len(parsed["data"] if orient == "split" else parsed)
+    assert 0 < num_rows < 200
+    expected_df = pd.DataFrame([[i, i + 1000] for i in range(num_rows)], columns=["id", "id"])
+    assert result == expected_df.to_json(orient=orient)
+
+
 def test_parse_query_result_with_null_values():
     resp = {
         "manifest": {
@@ -353,20 +585,55 @@ def test_parse_query_result_trims_large_data(max_tokens):
         assert len(result_df) == len(expected_df) or next_row_exceeds
 
 
+@pytest.mark.parametrize(
+    "row_tokens",
+    [
+        [12] * 100,  # exact estimate
+        [1] * 100,  # underestimate
+        [40] * 100,  # overestimate
+        [12] * 7,  # rows spanning several lines
+    ],
+)
+def test_get_row_cutoff_corrects_estimate(row_tokens):
+    # Rendering n rows costs 5 + 12 * n tokens, so 41 rows are the most that fit in 500.
+    with patch("databricks_ai_bridge.genie.MAX_TOKENS_OF_DATA", 500):
+        assert _get_row_cutoff(row_tokens, 5, 100, lambda n: 5 + 12 * n > 500) == 41
+
+
 def test_poll_query_results_max_iterations(genie, mock_workspace_client):
     # patch MAX_ITERATIONS to 2 for this test and sleep to avoid delays
     with (
         patch("databricks_ai_bridge.genie.MAX_ITERATIONS", 2),
-        patch("time.sleep", return_value=None),
+        patch("time.sleep", return_value=None) as mock_sleep,
     ):
-        mock_workspace_client.genie._api.do.side_effect = [
-            {
-                "status": "COMPLETED",
-                "attachments": [{"attachment_id": "123", "query": {"query": "SELECT *"}}],
-            },
-            {"statement_response": {"status": {"state": "PENDING"}}},
-            {"statement_response": {"status": {"state": "PENDING"}}},
-            {"statement_response": {"status": {"state": "PENDING"}}},
-        ]
+        mock_workspace_client.genie._api.do.side_effect = itertools.chain(
+            [
+                {
+                    "status": "COMPLETED",
+                    "attachments": [{"attachment_id": "123", "query": {"query": "SELECT *"}}],
+                }
+            ],
+            itertools.repeat({"statement_response": {"status": {"state": "PENDING"}}}),
+        )
         result = genie.poll_for_result("123", "456")
-        assert result.result == "Genie query for result timed out after 2 iterations of 5 seconds"
+        assert result.result == "Genie query for result timed out after waiting 10 seconds"
+    assert sum(call.args[0] for call in mock_sleep.call_args_list) == pytest.approx(10)
+
+
+@pytest.mark.parametrize("trace_internals", [True, False])
+def test_trace_internal(trace_internals):
+    def helper():
+        return "result"
+
+    with (
+        patch("databricks_ai_bridge.genie._TRACE_INTERNALS", trace_internals),
+        patch("databricks_ai_bridge.genie.mlflow.trace") as mock_trace,
+    ):
+        decorated = _trace_internal(span_type="PARSER")(helper)
+
+    if trace_internals:
+        mock_trace.assert_called_once_with(span_type="PARSER")
+        assert decorated is mock_trace.return_value.return_value
+    else:
+        mock_trace.assert_not_called()
+        assert decorated is helper